@@ -1,7 +1,72 @@
 import pdfplumber
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import repeat
+import mmap
+import os
 import re
 
+# Smallest page range worth handing to a separate worker process
+_MIN_PAGES_PER_WORKER = 25
+
+# Patterns are compiled once at import instead of on every line/page.
+# Line-level structure: one alternation scanned over the whole page, branch
+# order gives the same priority as checking chapter, section, references,
+# appendix in turn. Each match is anchored on the newline that starts its line
+# (the page text is scanned with a '\n' prepended); a literal first character
+# lets the search jump from newline to newline, where a MULTILINE '^' would be
+# tried at every position. [^\S\n] is \s without the newline so a match never
+# runs past the end of its line. The lookahead right after the newline is a
+# first-character prefilter: prose lines, and empty ones, fail on one class
+# test instead of entering all four branches. The arabic/roman chapter number
+# alternation needs no splitting: its branches differ on the first character,
+# so the one that cannot match fails immediately.
+_PAGE_RE = re.compile(
+    r'\n(?=[\dABCRbr])(?:'
+    r'(?P<chapter>(?:Chapter|CHAPTER)[^\S\n]+(?P<chapter_num>\d+|[IVXLC]+)[.:][^\S\n]*(?P<chapter_title>.+))'
+    r'|(?P<section>(?P<section_num>\d+\.(?:\d+)*)[^\S\n]+(?P<section_title>.+))'
+    r'|(?P<reference>(?i:References|Bibliography)(?![^\n]))'
+    r'|(?P<appendix>Appendix[^\S\n]+(?P<appendix_letter>[A-Z]):[^\S\n]*(?P<appendix_title>.+))'
+    r')'
+)
+# Page pre-test for the references branch; same (?i:...) group so it follows
+# the regex engine's case-insensitive rules (str.casefold() does not)
+_REFERENCE_WORD_RE = re.compile(r'(?i:References|Bibliography)')
+# Page-level captions/equations: one scan per page. Figure and table captions
+# are captured in a lookahead so only the keyword is consumed and equation
+# numbers inside a caption are still found. Every branch starts with a plain
+# literal (no wrapping group), which lets the compiler build a first-character
+# set {F, T, (} so the search skips non-candidate positions in C instead of
+# trying all three branches at every character.
+_CAPTION_RE = re.compile(
+    r'Figure(?=\s+(?P<figure_num>\d+\.?\d*)[.:]\s*(?P<figure_caption>.+))'
+    r'|Table(?=\s+(?P<table_num>\d+\.?\d*)[.:]\s*(?P<table_caption>.+))'
+    r'|\(\s*(?i:eq|equation)?\s*(?P<equation_num>\d+\.?\d*)\s*\)'
+)
+
+def _available_cpus():
+    """CPUs this process may run on (affinity/cgroup aware where possible)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+@contextmanager
+def _open_pdf(file_path):
+    """Open the PDF through a read-only mmap of the file"""
+    # pdfminer seeks around the file a lot; with an mmap those reads are
+    # served from the OS page cache without a read/seek syscall each
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # An empty file cannot be mapped; hand pdfplumber the file so it
+            # raises its usual error for it
+            with pdfplumber.open(f) as pdf:
+                yield pdf
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                pdfplumber.open(mm) as pdf:
+            yield pdf
+
 class AcademicBookMapper:
     def __init__(self, file_path):
         self.file_path = file_path
@@ -18,101 +83,190 @@ class AcademicBookMapper:
         self.current_chapter = None
         self.hierarchy = defaultdict(list)
 
-    def analyze(self):
+    def analyze(self, max_workers=None):
         """Main analysis function"""
-        with pdfplumber.open(self.file_path) as pdf:
-            for page_num, page in enumerate(pdf.pages, 1):
-                text = page.extract_text()
-                if text:
-                    self._analyze_page_structure(text, page_num)
-                    self._detect_figures_tables(page, page_num)
+        # Pages are independent, so the book is split into contiguous page
+        # ranges processed in separate processes (pdfplumber is single
+        # threaded and GIL-bound) and merged back in page order
+        max_workers = max_workers or _available_cpus()
+        with _open_pdf(self.file_path) as pdf:
+            n_pages = len(pdf.pages)
+            n_workers = max(1, min(max_workers, n_pages // _MIN_PAGES_PER_WORKER))
+            if n_workers == 1:
+                # Serial run: reuse the PDF already opened for the page count;
+                # only worker processes open it again
+                self._analyze_pages(pdf.pages, 1)
+
+        if n_workers > 1:
+            chunk_size = -(-n_pages // n_workers)
+            starts = range(0, n_pages, chunk_size)
+            ends = [min(start + chunk_size, n_pages) for start in starts]
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                for structure in executor.map(_process_page_range, repeat(self.file_path), starts, ends):
+                    self._merge_structure(structure)
         
         return self._generate_book_map()
 
+    def _analyze_page_range(self, start, end):
+        """Analyze pages [start, end) into this mapper's structure"""
+        with _open_pdf(self.file_path) as pdf:
+            self._analyze_pages(pdf.pages[start:end], start + 1)
+
+    def _analyze_pages(self, pages, first_page_num):
+        """Analyze pages of an open PDF, numbering them from first_page_num"""
+        for page_num, page in enumerate(pages, first_page_num):
+            # The PDF is opened without laparams, so pdfminer's layout
+            # analysis never runs. extract_text_simple() is not used: it
+            # keeps raw spacing ("References ", "Chapter 1: ") that the
+            # heading patterns rely on extract_text() to normalize.
+            text = page.extract_text()
+            if text:
+                self._analyze_page_structure(text, page_num)
+                self._detect_figures_tables(page, text, page_num)
+            # Release the page's parsed objects, layout and cached
+            # textmap (close() also clears the per-page get_textmap
+            # lru_cache that flush_cache() leaves behind); pdf.pages
+            # keeps every Page alive, so without this each page's chars
+            # would stay in memory until the whole range is done
+            page.close()
+
+    def _merge_structure(self, structure):
+        """Append a worker's structure for the next page range to this one"""
+        # Section indices are local to the worker's range; shift them past
+        # the sections merged so far
+        offset = len(self.structure['sections'])
+        for chapter in structure['chapters']:
+            chapter['section_indices'] = [offset + i for i in chapter['section_indices']]
+
+        # Sections found before the range's first chapter belong to the
+        # chapter that was current at the end of the previous range
+        attached = sum(len(chapter['section_indices']) for chapter in structure['chapters'])
+        leading = len(structure['sections']) - attached
+        if self.current_chapter:
+            self.current_chapter['section_indices'].extend(range(offset, offset + leading))
+
+        for key, items in structure.items():
+            self.structure[key].extend(items)
+        if structure['chapters']:
+            self.current_chapter = structure['chapters'][-1]
+
     def _analyze_page_structure(self, text, page_num):
         """Analyze the hierarchical structure of the page"""
-        lines = text.split('\n')
-        
-        for line in lines:
+        # Substring pre-test (fast C search) before starting the regex engine:
+        # every heading needs one of these, so pages of figures, axis labels
+        # or stray numbers are skipped outright
+        if ('.' not in text and 'Chapter' not in text and 'CHAPTER' not in text
+                and 'Appendix' not in text and not _REFERENCE_WORD_RE.search(text)):
+            return
+
+        # Bound once per page instead of attribute/key lookups per match
+        chapters = self.structure['chapters']
+        sections = self.structure['sections']
+        references = self.structure['references']
+        appendices = self.structure['appendices']
+        current_chapter = self.current_chapter
+
+        for match in _PAGE_RE.finditer('\n' + text):
+            kind = match.lastgroup
+
             # Chapter detection
-            chapter_match = re.match(r'^(?:Chapter|CHAPTER)\s+(\d+|[IVXLC]+)[.:]\s*(.+)', line)
-            if chapter_match:
-                chapter_num, chapter_title = chapter_match.groups()
-                self.current_chapter = {
-                    'number': chapter_num,
-                    'title': chapter_title.strip(),
+            if kind == 'chapter':
+                current_chapter = {
+                    'number': match.group('chapter_num'),
+                    'title': match.group('chapter_title').strip(),
                     'page': page_num,
-                    'sections': []
+                    'section_indices': []    # Indices into structure['sections']
                 }
-                self.structure['chapters'].append(self.current_chapter)
-                continue
+                chapters.append(current_chapter)
 
             # Section detection
-            section_match = re.match(r'^(\d+\.(?:\d+)*)\s+(.+)', line)
-            if section_match:
-                section_num, section_title = section_match.groups()
+            elif kind == 'section':
+                section_num = match.group('section_num')
                 section = {
                     'number': section_num,
-                    'title': section_title.strip(),
+                    'title': match.group('section_title').strip(),
                     'page': page_num,
                     'level': len(section_num.split('.')) - 1
                 }
                 
-                if self.current_chapter:
-                    self.current_chapter['sections'].append(section)
-                self.structure['sections'].append(section)
-                continue
+                if current_chapter:
+                    current_chapter['section_indices'].append(len(sections))
+                sections.append(section)
 
             # Reference section detection
-            if re.match(r'^References$|^Bibliography$', line, re.IGNORECASE):
-                self.structure['references'].append({
-                    'title': line.strip(),
+            elif kind == 'reference':
+                references.append({
+                    'title': match.group('reference'),
                     'page': page_num
                 })
-                continue
 
             # Appendix detection
-            appendix_match = re.match(r'^Appendix\s+([A-Z]):\s*(.+)', line)
-            if appendix_match:
-                appendix_letter, appendix_title = appendix_match.groups()
-                self.structure['appendices'].append({
-                    'letter': appendix_letter,
-                    'title': appendix_title.strip(),
+            else:
+                appendices.append({
+                    'letter': match.group('appendix_letter'),
+                    'title': match.group('appendix_title').strip(),
                     'page': page_num
                 })
 
-    def _detect_figures_tables(self, page, page_num):
-        """Detect figures and tables on the page"""
-        text = page.extract_text()
-        
-        # Figure detection
-        figure_matches = re.finditer(r'Figure\s+(\d+\.?\d*)[.:]\s*(.+)', text)
-        for match in figure_matches:
-            fig_num, fig_caption = match.groups()
-            self.structure['figures'].append({
-                'number': fig_num,
-                'caption': fig_caption.strip(),
-                'page': page_num
-            })
-
-        # Table detection
-        table_matches = re.finditer(r'Table\s+(\d+\.?\d*)[.:]\s*(.+)', text)
-        for match in table_matches:
-            table_num, table_caption = match.groups()
-            self.structure['tables'].append({
-                'number': table_num,
-                'caption': table_caption.strip(),
-                'page': page_num
-            })
-
-        # Equation detection
-        equations = re.finditer(r'\(\s*(?:eq|equation)?\s*(\d+\.?\d*)\s*\)', text, re.IGNORECASE)
-        for match in equations:
-            eq_num = match.group(1)
-            self.structure['equations'].append({
-                'number': eq_num,
-                'page': page_num
-            })
+        self.current_chapter = current_chapter
+
+    def _detect_figures_tables(self, page, text, page_num):
+        """Detect figures, tables and equations in the page's extracted text"""
+        if 'Figure' not in text and 'Table' not in text and '(' not in text:
+            return
+
+        # End of the last figure/table caption: a keyword inside a caption is
+        # skipped, as it was with one scan per kind
+        figure_end = table_end = 0
+        # Appends bound once per page instead of looked up per match
+        add_figure = self.structure['figures'].append
+        add_table = self.structure['tables'].append
+        add_equation = self.structure['equations'].append
+
+        for match in _CAPTION_RE.finditer(text):
+            kind = match.lastgroup
+
+            # Figure detection
+            if kind == 'figure_caption':
+                if match.start() < figure_end:
+                    continue
+                figure_end = match.end('figure_caption')
+                add_figure({
+                    'number': match.group('figure_num'),
+                    'caption': match.group('figure_caption').strip(),
+                    'page': page_num
+                })
+
+            # Table detection
+            elif kind == 'table_caption':
+                if match.start() < table_end:
+                    continue
+                table_end = match.end('table_caption')
+                add_table({
+                    'number': match.group('table_num'),
+                    'caption': match.group('table_caption').strip(),
+                    'page': page_num
+                })
+
+            # Equation detection
+            else:
+                add_equation({
+                    'number': match.group('equation_num'),
+                    'page': page_num
+                })
+
+    def _project_chapter(self, chapter):
+        """Public view of a chapter, sharing the already parsed section dicts"""
+        indices = chapter['section_indices']
+        # A chapter owns every section from its heading up to the next
+        # chapter, so its indices are one contiguous run and a slice copies
+        # the references in C
+        return {
+            'number': chapter['number'],
+            'title': chapter['title'],
+            'page': chapter['page'],
+            'sections': self.structure['sections'][indices[0]:indices[-1] + 1] if indices else []
+        }
 
     def _generate_book_map(self):
         """Generate a structured map of the book"""
@@ -124,23 +278,7 @@ class AcademicBookMapper:
                 'total_equations': len(self.structure['equations'])
             },
             'structure': {
-                'chapters': [
-                    {
-                        'number': chapter['number'],
-                        'title': chapter['title'],
-                        'page': chapter['page'],
-                        'sections': [
-                            {
-                                'number': section['number'],
-                                'title': section['title'],
-                                'page': section['page'],
-                                'level': section['level']
-                            }
-                            for section in chapter['sections']
-                        ]
-                    }
-                    for chapter in self.structure['chapters']
-                ],
+                'chapters': list(map(self._project_chapter, self.structure['chapters'])),
                 'figures': self.structure['figures'],
                 'tables': self.structure['tables'],
                 'equations': self.structure['equations'],
@@ -150,11 +288,18 @@ class AcademicBookMapper:
         }
         return book_map
 
-def map_academic_book(file_path):
+def _process_page_range(file_path, start, end):
+    """Worker: analyze pages [start, end) and return the partial structure"""
+    mapper = AcademicBookMapper(file_path)
+    mapper._analyze_page_range(start, end)
+    return mapper.structure
+
+def map_academic_book(file_path, max_workers=None):
     """Convenience function to map an academic book's structure"""
     mapper = AcademicBookMapper(file_path)
-    return mapper.analyze()
+    return mapper.analyze(max_workers)
 
 
 
-book_structure = map_academic_book("DataEngineerGarethEdgar.pdf")
\ No newline at end of file
+if __name__ == '__main__':
+    book_structure = map_academic_book("DataEngineerGarethEdgar.pdf")
@@ -1,58 +1,135 @@
 import pdfplumber
+import json
+import os
 import re
-from typing import List, Tuple
+import sys
+import tempfile
+from operator import itemgetter
+from tqdm import tqdm
+from typing import List, Optional, Tuple
 
-def find_chapters_with_details(input_pdf: str) -> List[Tuple]:
+# Exact pattern match
+# Only chapters 1-25 are of interest, so the range is encoded in the pattern
+# (leading zeros allowed) and out-of-range numbers never produce a match
+_CHAPTER_RE = re.compile(r'Chapter 0*(2[0-5]|1\d|[1-9]): ')  # Matches "Chapter X: " exactly, captures X
+
+# Scan results are cached next to the PDF as "<input_pdf>.chapmap.json";
+# bump the version when the scan logic changes so old caches are ignored.
+# JSON rather than pickle: the file sits in the PDF's directory, and loading
+# a planted pickle would run arbitrary code.
+_CACHE_SUFFIX = '.chapmap.json'
+_CACHE_VERSION = 1
+
+def _load_cached_results(cache_path: str, cache_key: Tuple) -> Optional[List[Tuple]]:
+    """
+    Return cached scan results if they were saved for cache_key, else None
+    """
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached['key'] != list(cache_key):
+            return None
+        return [tuple(result) for result in cached['results']]
+    except (OSError, ValueError, KeyError, TypeError):
+        # Missing, unreadable or malformed cache: rescan
+        return None
+
+def _save_cached_results(cache_path: str, cache_key: Tuple, results: List[Tuple]) -> None:
+    """
+    Save scan results for cache_key; a failed write only means no cache
+    """
+    # Written to a temporary file and renamed into place, so an interrupted
+    # write never leaves a partial cache behind
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(cache_path)),
+                                        suffix='.tmp')
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'key': list(cache_key), 'results': results}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+def find_chapters_with_details(input_pdf: str, max_pages_after_last: Optional[int] = None) -> List[Tuple]:
     """
     Find chapters using exact pattern "Chapter X: " (with space after colon)
+
+    If max_pages_after_last is set, scanning stops once that many pages
+    have passed without a chapter match (e.g. references and index at
+    the end of the book). By default every page is scanned.
+
+    Results are cached on disk and reused until the PDF's modification
+    time or size changes.
     """
-    # Exact pattern match
-    pattern = re.compile(r'Chapter \d+: ')  # Matches "Chapter X: " exactly
+    cache_path = f"{input_pdf}{_CACHE_SUFFIX}"
+    stat = os.stat(input_pdf)
+    cache_key = (_CACHE_VERSION, stat.st_mtime_ns, stat.st_size, max_pages_after_last)
+    results = _load_cached_results(cache_path, cache_key)
+    if results is not None:
+        print(f"Using cached chapter scan for {input_pdf}")
+        return results
     
     results = []
     print(f"Analyzing {input_pdf} for exact chapter pattern 'Chapter X: '...")
     
     with pdfplumber.open(input_pdf) as pdf:
         total_pages = len(pdf.pages)
+        last_found_page = None
         
-        for page_num in range(total_pages):
-            if page_num % 10 == 0:
-                print(f"Scanning page {page_num + 1}/{total_pages}")
-            
+        # Progress goes to stderr, rate-limited by tqdm; no bar when not a tty
+        for page_num in tqdm(range(total_pages), desc="Scanning pages", unit="page",
+                             disable=not sys.stderr.isatty()):
             page = pdf.pages[page_num]
             text = page.extract_text()
             
+            # Words are extracted lazily, at most once per page
+            words = None
+            font_size = None
+            
             # Find all matches
-            matches = pattern.finditer(text)
+            matches = _CHAPTER_RE.finditer(text)
             for match in matches:
                 # Extract the chapter number
                 chapter_text = match.group()  # e.g., "Chapter 1: "
-                chapter_num = int(re.search(r'\d+', chapter_text).group())
+                chapter_num = int(match.group(1))
+                
+                # Get some context
+                start = max(0, match.start() - 30)
+                end = min(len(text), match.end() + 30)
+                context = text[start:end].replace('\n', ' ').strip()
                 
-                if 1 <= chapter_num <= 25:
-                    # Get some context
-                    start = max(0, match.start() - 30)
-                    end = min(len(text), match.end() + 30)
-                    context = text[start:end].replace('\n', ' ').strip()
-                    
-                    # Try to get font size
+                # Try to get font size
+                if words is None:
                     words = page.extract_words(keep_blank_chars=True, extra_attrs=['size'])
-                    font_size = None
                     for word in words:
-                        if 'Chapter' in word['text']:
+                        if word['text'].startswith('Chapter'):
                             font_size = word['size']
                             break
-                    
-                    results.append((
-                        chapter_num,
-                        page_num,
-                        font_size,
-                        context,
-                        chapter_text
-                    ))
+                
+                results.append((
+                    chapter_num,
+                    page_num,
+                    font_size,
+                    context,
+                    chapter_text
+                ))
+                last_found_page = page_num
+            
+            # Stop early once chapters have clearly ended
+            if (max_pages_after_last is not None and last_found_page is not None
+                    and page_num - last_found_page >= max_pages_after_last):
+                tqdm.write(f"No chapters in the last {max_pages_after_last} pages, "
+                           f"stopping at page {page_num + 1}/{total_pages}")
+                break
     
     # Sort by chapter number
-    results.sort(key=lambda x: x[0])
+    results.sort(key=itemgetter(0))
+    _save_cached_results(cache_path, cache_key, results)
     return results
 
 def display_chapter_analysis(results: List[Tuple]) -> None: